@@ -1,6 +1,14 @@
+import os
+from concurrent.futures import BrokenExecutor
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
+
+import aggregates
+import charts
+import export
+from data import dataset_hash, filter_selection, ingest
+from device import detect_mobile
+from disk_cache import cached_figure, cached_sections, default_cache
 
 # Page Config
 st.set_page_config(page_title="Tire Market Dashboard", layout="wide")
@@ -27,140 +35,156 @@ elif view_mode == "Mobile View":
 else:
     st.session_state.view_mode = 'auto'
 
-# Add CSS for responsive design based on view mode
+# Theme stylesheets are static assets (see .streamlit/config.toml), so each
+# rerun only sends the <link> tags and the browser fetches the CSS once
 if st.session_state.view_mode == 'mobile':
     # Force mobile view
-    st.markdown("""
-    <style>
-        .main .block-container {
-            padding-left: 1rem;
-            padding-right: 1rem;
-        }
-        h1 {
-            font-size: 1.5rem !important;
-        }
-        h2 {
-            font-size: 1.3rem !important;
-        }
-        h3, h4, h5 {
-            font-size: 1.1rem !important;
-        }
-        .stMetric {
-            padding: 10px 5px !important;
-        }
-        .card {
-            padding: 10px !important;
-        }
-        /* Force columns to stack */
-        [data-testid="column"] {
-            width: 100% !important;
-            flex: 1 1 100% !important;
-            min-width: 100% !important;
-        }
-    </style>
-    """, unsafe_allow_html=True)
+    theme_sheets = ["theme.css", "mobile.css"]
     is_mobile_view = True
 elif st.session_state.view_mode == 'desktop':
     # Force desktop view
+    theme_sheets = ["theme.css"]
     is_mobile_view = False
 else:
-    # Auto-detect - add responsive CSS that only applies on small screens
-    st.markdown("""
-    <style>
-        @media (max-width: 768px) {
-            .main .block-container {
-                padding-left: 1rem;
-                padding-right: 1rem;
-            }
-            h1 {
-                font-size: 1.5rem !important;
-            }
-            h2 {
-                font-size: 1.3rem !important;
-            }
-            h3, h4, h5 {
-                font-size: 1.1rem !important;
-            }
-            .stMetric {
-                padding: 10px 5px !important;
-            }
-            .card {
-                padding: 10px !important;
-            }
-        }
-    </style>
-    """, unsafe_allow_html=True)
-    # Auto-detect for columns
-    is_mobile_view = st.session_state.get('detected_mobile', False)
-
-# Add common styles
-st.markdown("""
-<style>
-    .card {
-        background-color: #F8F9FA;
-        padding: 20px;
-        border-radius: 12px;
-        box-shadow: 0px 4px 10px rgba(0, 0, 0, 0.1);
-        text-align: center;
-        margin-bottom: 20px;
-    }
-    .icon {
-        font-size: 30px;
-        color: #6C63FF;
-    }
-    .title {
-        font-weight: bold;
-        font-size: 20px;
-        margin-bottom: 10px;
-    }
-    .data-row {
-        display: flex;
-        justify-content: space-between;
-        padding: 10px 20px;
-        border-top: 1px solid #E0E0E0;
-        font-size: 16px;
-    }
-    .data-row:first-child {
-        border-top: none;
-    }
-    .highlight {
-        color: #6C63FF;
-        font-weight: bold;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# Add device detection JavaScript
-st.components.v1.html("""
-<script>
-    // Detect if the device is mobile
-    const isMobile = /iPhone|iPad|iPod|Android/i.test(navigator.userAgent) || window.innerWidth < 768;
-    
-    // Store this information to be used by Streamlit
-    if (window.parent.streamlit) {
-        const data = {
-            detected_mobile: isMobile
-        };
-        window.parent.streamlit.setComponentValue(data);
-    }
-</script>
-""", height=0)
+    # Auto-detect - responsive CSS for small screens, device detection for columns
+    theme_sheets = ["theme.css", "responsive.css"]
+    is_mobile_view = bool(detect_mobile())
+
+st.markdown(
+    "".join(f'<link rel="stylesheet" href="app/static/{sheet}">' for sheet in theme_sheets),
+    unsafe_allow_html=True
+)
 
 # Load dataset
-df = pd.read_csv("Data/202425_data_2countries_3tiresizes (1).csv")
+@st.cache_data
+def get_data():
+    return ingest()
+
+
+@st.cache_data
+def get_dataset_key():
+    # Content hash keying the disk cache, so entries survive restarts
+    return dataset_hash()
+
+
+@st.cache_resource(on_release=lambda pool: pool.shutdown(wait=False, cancel_futures=True))
+def get_export_pool():
+    # One worker pool per server process, shared by every session
+    return export.make_pool()
+
+
+def submit_export(submit):
+    # A worker killed mid-render (a Chrome crash, the OOM killer) breaks the
+    # whole pool; rebuild it once instead of failing every later export
+    try:
+        return submit(get_export_pool())
+    except BrokenExecutor:
+        get_export_pool.clear()
+        return submit(get_export_pool())
+
+
+df, ingest_report = get_data()
 
 # Sidebar Filters with Icons
 st.sidebar.header("🔍 Filters")
-selected_year = st.sidebar.selectbox("📅 Select Year", df["SALES_YEAR"].unique())
-selected_countries = st.sidebar.selectbox("🌍 Select Countries", df["COUNTRY_OR_TERRITORY"].unique())
-selected_tire_size = st.sidebar.selectbox("📏 Select Tire Size", df["TIRE_SIZE"].unique())
+selected_year = st.sidebar.selectbox("📅 Select Year", df["SALES_YEAR"].dropna().unique())
+selected_countries = st.sidebar.selectbox("🌍 Select Countries", df["COUNTRY_OR_TERRITORY"].dropna().unique())
+selected_tire_size = st.sidebar.selectbox("📏 Select Tire Size", df["TIRE_SIZE"].dropna().unique())
+
+# Rows dropped or flagged while loading the dataset
+if ingest_report.bad_rows or ingest_report.missing_key:
+    st.sidebar.warning(f"⚠️ Data quality: {ingest_report.summary()}")
 
 # Filtered Data
-df_filtered = df[
-    (df["SALES_YEAR"] == selected_year) &
-    (df["COUNTRY_OR_TERRITORY"] == (selected_countries)) & 
-    (df["TIRE_SIZE"] == selected_tire_size)
-]
+selection = (selected_year, selected_countries, selected_tire_size)
+df_filtered = filter_selection(df, *selection)
+
+# Section aggregates and figures go through the disk cache, shared across
+# restarts and replicas
+dataset_key = get_dataset_key()
+sections = cached_sections(df, dataset_key, selection)
+
+# ---- Export ----
+# Exports render and are zipped in the worker pool; the futures live in
+# session state and a polling fragment reads progress back, so neither the
+# script nor other widgets ever wait on them.
+st.sidebar.header("📤 Export")
+export_formats = st.sidebar.multiselect("Formats", export.EXPORT_FORMATS, default=["html"])
+export_current = st.sidebar.button("Export current selection")
+export_all = st.sidebar.button("Batch export all countries & sizes")
+
+if export_current or export_all:
+    if export_current:
+        export_selections = [selection]
+    else:
+        export_selections = export.all_selections(df, selected_year)
+    try:
+        export.cleanup_exports()
+        st.session_state.export_dir = export.new_export_dir()
+        st.session_state.export_jobs = submit_export(
+            lambda pool: export.submit_batch(pool, export_selections, st.session_state.export_dir, export_formats)
+        )
+    except (ValueError, RuntimeError) as e:
+        st.session_state.export_jobs = None
+        st.sidebar.error(str(e))
+    st.session_state.export_zip_job = None
+    st.session_state.export_zip = None
+    st.session_state.export_error = None
+
+
+def export_status():
+    export_jobs = st.session_state.get('export_jobs')
+    if not export_jobs:
+        return
+    if st.session_state.get('export_error'):
+        st.error(st.session_state.export_error)
+        return
+    jobs_done = sum(job.done() for job in export_jobs)
+    st.progress(jobs_done / len(export_jobs), text=f"{jobs_done}/{len(export_jobs)} selections exported")
+    if jobs_done < len(export_jobs):
+        return
+
+    failed = [job.exception() for job in export_jobs if job.exception() is not None]
+    if failed:
+        st.error(f"{len(failed)} export(s) failed: {failed[0]}")
+
+    if st.session_state.get('export_zip') is None:
+        # Zip once, in the pool; the folder is deleted once it is zipped
+        if st.session_state.get('export_zip_job') is None:
+            try:
+                st.session_state.export_zip_job = submit_export(
+                    lambda pool: pool.submit(export.zip_exports, st.session_state.export_dir, True)
+                )
+            except (BrokenExecutor, RuntimeError) as e:
+                st.session_state.export_error = f"Export could not be zipped: {e}"
+                st.rerun()
+        zip_job = st.session_state.export_zip_job
+        if not zip_job.done():
+            st.caption("Compressing export…")
+            return
+        if zip_job.exception() is not None:
+            st.session_state.export_error = f"Export could not be zipped: {zip_job.exception()}"
+        else:
+            st.session_state.export_zip = zip_job.result()
+        # Full rerun so the fragment stops polling
+        st.rerun()
+
+    st.download_button(
+        "⬇️ Download export",
+        data=st.session_state.export_zip,
+        file_name=f"{os.path.basename(st.session_state.export_dir)}.zip",
+        mime="application/zip"
+    )
+
+
+# Poll only while an export is still running or being zipped
+export_polling = (
+    bool(st.session_state.get('export_jobs'))
+    and st.session_state.get('export_zip') is None
+    and not st.session_state.get('export_error')
+)
+with st.sidebar:
+    st.fragment(run_every=2 if export_polling else None)(export_status)()
 
 # ---- Main Layout ----
 st.title("🚗 Tire Market Dashboard")
@@ -172,109 +196,39 @@ if is_mobile_view:
     
     # ---- Industry & Goodyear Sales ----
     st.subheader("📊 Industry & Goodyear Sales")
-    sales_data = df_filtered[["TOTAL_INDUSTRY_SALES", "GOODYEAR_SALES"]].drop_duplicates().melt(var_name="Sales Type", value_name="Sales Value")
-    
-    # Rename for display only
-    sales_type_mapping = {
-        "TOTAL_INDUSTRY_SALES": "Total Industry Sales",
-        "GOODYEAR_SALES": "Goodyear Sales"
-    }
-    sales_data["Sales Type"] = sales_data["Sales Type"].map(sales_type_mapping)
-
-    
-    fig_sales = px.bar(
-        sales_data,
-        x="Sales Type",
-        y="Sales Value",
-        title="Industry & Goodyear Sales",
-        text_auto=True,
-        color="Sales Type",
-        color_discrete_map={
-            "Total Industry Sales": "#1f77b4",  # Blue
-            "Goodyear Sales": "#ffcc00"  # Yellow
-        }
-    )
-    fig_sales.update_layout(
-        xaxis_title="Sales Type",
-        yaxis_title="Sales Value"
-    )
+    sales_data = sections["sales"]
+    fig_sales = cached_figure(dataset_key, selection, "sales", lambda: charts.sales_figure(sales_data))
     st.plotly_chart(fig_sales, use_container_width=True)
     
     # ---- Market Share ----
     st.subheader("📊 Market Share of Goodyear")
-    market_share = df_filtered[["SOM_OF_BRAND"]].drop_duplicates()["SOM_OF_BRAND"].mean()
+    market_share = sections["market_share"]
     st.markdown("Market Share (%)", help="Calculated based on SOM of the selected brand.")
     st.markdown(f"<h3>{market_share * 100:.2f}%</h3>", unsafe_allow_html=True)
     
     # ---- Competitor Sales ----
     st.subheader("🏆 Competitor Sales Comparison")
-    df_competitor_sales = (
-        df_filtered[["COMPETITOR_BRAND", "COMPETITOR_BRAND_SALES"]]
-        .drop_duplicates()
-        .groupby("COMPETITOR_BRAND", as_index=False)
-        .sum()
-        .sort_values(by="COMPETITOR_BRAND_SALES", ascending=False)
-        .head(10)  # Limit to top 10 competitors
-    )
-    fig_comp = px.bar(
-        df_competitor_sales, 
-        x="COMPETITOR_BRAND", 
-        y="COMPETITOR_BRAND_SALES", 
-        title="Top Competitor Sales", 
-        text_auto=True,
-        color_discrete_sequence=["#00CC96"]
-    )
-    fig_comp.update_layout(
-        xaxis_title="Competitor brand",
-        yaxis_title="Competitor brand sales",
-        xaxis={'categoryorder': 'total descending'}
-    )
+    df_competitor_sales = sections["competitor_sales"]
+    fig_comp = cached_figure(dataset_key, selection, "competitor_sales", lambda: charts.competitor_sales_figure(df_competitor_sales))
     st.plotly_chart(fig_comp, use_container_width=True)
 
     
     # ---- Market Share Distribution ----
     st.subheader("📊 Market Share Distribution")
-    df_valid_brands = df_filtered.dropna(subset=["BRAND_NAME"])
-    brand_counts = df_valid_brands["BRAND_NAME"].value_counts().reset_index()
-    brand_counts.columns = ["BRAND_NAME", "COUNT"]
-    total_brands = brand_counts["COUNT"].sum()
-    brand_counts["PERCENTAGE"] = (brand_counts["COUNT"] / total_brands) * 100
-    fig_pie = px.pie(
-        brand_counts, 
-        names="BRAND_NAME", 
-        values="PERCENTAGE", 
-        title="Market Share Distribution",
-        color_discrete_sequence=px.colors.qualitative.Pastel
-    )
-    fig_pie.update_traces(
-        textinfo="label",
-        hovertemplate="<b>%{label}</b><br>Market Share: %{value:.2f}%"
-    )
+    brand_counts = sections["brand_share"]
+    fig_pie = cached_figure(dataset_key, selection, "brand_share", lambda: charts.brand_share_figure(brand_counts))
     st.plotly_chart(fig_pie, use_container_width=True)
     
     # ---- Top 10 Competitors Table ----
     st.subheader("🥇 Top 10 Competitors")
 
     # Rename columns
-    df_top_competitors = df_filtered.rename(columns={
+    df_top_competitors = sections["top_competitors"].rename(columns={
         "COMPETITOR_BRAND": "Competitor Brand",
         "COMPETITOR_BRAND_SALES": "Competitor Sales",
         "COMPETITOR_SOM_OF_BRAND": "Competitor Market Share"
     })
 
-
-    # Drop duplicates before aggregation
-    df_top_competitors = df_top_competitors[["Competitor Brand", "Competitor Sales", "Competitor Market Share"]].drop_duplicates()
-
-        # Aggregate values
-    df_top_competitors = df_top_competitors.groupby("Competitor Brand", as_index=False).agg({
-        "Competitor Sales": "max",
-        "Competitor Market Share": "mean"
-    })
-
-    # Sort and select top 10 competitors
-    df_top_competitors = df_top_competitors.sort_values(by="Competitor Sales", ascending=False).head(10)
-
     # Convert SOM to percentage and format to 2 decimal places
     df_top_competitors["Competitor Market Share"] = df_top_competitors["Competitor Market Share"] * 100
     df_top_competitors["Competitor Market Share"] = df_top_competitors["Competitor Market Share"].apply(lambda x: f"{x:.2f}%")
@@ -283,21 +237,6 @@ if is_mobile_view:
     # Convert all columns to strings for center alignment
     df_top_competitors = df_top_competitors.astype(str)
 
-    # Custom CSS for dynamic dark/light mode styling
-    st.markdown("""
-        <style>
-            /* Ensure visibility in dark mode */
-            div[data-testid="stDataFrame"] {
-                background-color: rgba(255, 255, 255, 0.1) !important; /* Transparent white for dark mode */
-                color: white !important; /* White text for dark mode */
-                border-radius: 10px;
-            }
-            div[data-testid="StyledDataFrame"] table {
-                background-color: transparent !important; /* Keep table transparent */
-                color: white !important; /* Keep text visible */
-            }
-        </style>
-    """, unsafe_allow_html=True)
 
     # Format dataframe to look modern
     # st.dataframe(
@@ -309,7 +248,6 @@ if is_mobile_view:
     #     use_container_width=True
     # )
 
-    df_top_competitors.reset_index(drop=True, inplace=True)
     df_top_competitors.index = range(1, len(df_top_competitors) + 1)
     # Display styled dataframe
     st.dataframe(df_top_competitors, use_container_width=True)
@@ -330,15 +268,11 @@ if is_mobile_view:
     st.subheader("📊 Competitor Pattern Analysis")
     if not df_top_competitors.empty:
         selected_competitor = st.selectbox("Select Competitor", df_top_competitors["Competitor Brand"].unique())
-        df_competitor_pattern = df_filtered[df_filtered["COMPETITOR_BRAND"] == selected_competitor]
-        df_pattern_sales = df_competitor_pattern[["COMPETITOR_PATTERN", "COMPETITOR_PATTERN_SALES"]].drop_duplicates()
+        df_pattern_sales = aggregates.pattern_sales(df_filtered, selected_competitor)
         if not df_pattern_sales.empty:
-            fig_pattern_pie = px.pie(
-                df_pattern_sales, 
-                names="COMPETITOR_PATTERN", 
-                values="COMPETITOR_PATTERN_SALES", 
-                title=f"Sales Distribution by Pattern for {selected_competitor}",
-                color_discrete_sequence=px.colors.qualitative.Set3
+            fig_pattern_pie = cached_figure(
+                dataset_key, selection, f"pattern_sales/{selected_competitor}",
+                lambda: charts.pattern_figure(df_pattern_sales, selected_competitor)
             )
             st.plotly_chart(fig_pattern_pie, use_container_width=True)
         else:
@@ -346,31 +280,10 @@ if is_mobile_view:
     
     # ---- Price Bar Chart ----
     st.subheader("💰 Price Comparison by Design")
-
-    # Drop rows where 'SALES_PRICE_IN_USD' or 'DESIGN_NAME' is missing
-    df_price_chart = df_filtered.dropna(subset=["SALES_PRICE_IN_USD", "DESIGN_NAME"])
+    df_price_chart = sections["price_by_design"]
 
     if not df_price_chart.empty:
-        fig_price = px.bar(
-            df_price_chart,
-            x="DESIGN_NAME",
-            y="SALES_PRICE_IN_USD",
-            title="Price Comparison by Design",
-            text=df_price_chart["SALES_PRICE_IN_USD"].apply(lambda x: f"${x:,.2f}"),  # Format text with dollar sign
-            hover_data={"SALES_PRICE_IN_USD": True, "DESIGN_NAME": True, "BRAND_NAME": True, "BRAND_TYPE": True},
-            color="BRAND_NAME",
-            color_discrete_sequence=px.colors.qualitative.Set1
-        )
-
-        # Adjust axis labels
-        fig_price.update_layout(
-            xaxis_title="Design Name",
-            yaxis_title="Sales Price in USD"
-        )
-
-        # Adjust text position so the longest bar has a visible label
-        fig_price.update_traces(textposition="outside", cliponaxis=False)
-
+        fig_price = cached_figure(dataset_key, selection, "price_by_design", lambda: charts.price_figure(df_price_chart))
         st.plotly_chart(fig_price, use_container_width=True)
     else:
         st.warning("No data available for the selected filters.")
@@ -378,61 +291,10 @@ if is_mobile_view:
     
     # ---- Car Parc Data ----
     st.subheader("🚘 Carparc Data")
+    carparc_data = sections["carparc"]
 
-    if not df_filtered.empty:
-        carparc_data = df_filtered[["LUX_SUV_CARPARC", "TOTAL_CARPARC", "LUX_SUV_RATIO"]].drop_duplicates().iloc[0]
-
-        st.markdown("""
-            <style>
-                .card {
-                    background-color: #f8f8f8; /* Grey background */
-                    padding: 20px;
-                    border-radius: 10px;
-                    box-shadow: 2px 2px 5px rgba(0,0,0,0.2);
-                    width: 100%; /* Keep full width */
-                    margin-bottom: 10px;
-                }
-                .icon {
-                    font-size: 24px;
-                }
-                .title {
-                    font-size: 20px;
-                    font-weight: bold;
-                    margin-bottom: 10px;
-                    color: black; /* Ensure title is black */
-                }
-                .data-row {
-                    display: flex;
-                    justify-content: space-between;
-                    font-size: 18px; /* Keep original size */
-                    padding: 8px 0; /* Restore spacing */
-                    color: black; /* Ensure text is black */
-                }
-                .highlight {
-                    font-weight: bold;
-                    color: #a370f0; /* Purple for values */
-                }
-            </style>
-        """, unsafe_allow_html=True)
-
-        st.markdown(f"""
-            <div class="card">
-                <div class="icon">🔹</div>
-                <div class="title">Carparc Data</div>
-                <div class="data-row">
-                    <span>LUX SUV Carparc</span>
-                    <span class="highlight">{carparc_data['LUX_SUV_CARPARC']:,.2f}</span>
-                </div>
-                <div class="data-row">
-                    <span>Total Carparc</span>
-                    <span class="highlight">{carparc_data['TOTAL_CARPARC']:,.2f}</span>
-                </div>
-                <div class="data-row">
-                    <span>LUX SUV Ratio</span>
-                    <span class="highlight">{carparc_data['LUX_SUV_RATIO']*100:.2f}%</span>
-                </div>
-            </div>
-        """, unsafe_allow_html=True)
+    if carparc_data is not None:
+        st.markdown(charts.carparc_card_html(carparc_data), unsafe_allow_html=True)
 
     else:
         st.warning("No car parc data available for the selected filters.")
@@ -440,8 +302,7 @@ if is_mobile_view:
     
     # ---- Top 5 Fitments ----
     st.subheader("🛞 Top 5 Fitments")
-    fitments = df_filtered["TOP_5_FITMENTS"].dropna().unique()
-    for fitment in fitments[:5]:
+    for fitment in sections["top_fitments"]:
         st.write(f"✅ {fitment}")
     
 else:
@@ -449,128 +310,37 @@ else:
     
     # ---- Industry & Goodyear Sales (Bar Chart) ----
     st.subheader("📊 Industry & Goodyear Sales")
-
-    # Drop duplicates to ensure correct values
-    sales_data = df_filtered[["TOTAL_INDUSTRY_SALES", "GOODYEAR_SALES"]].drop_duplicates().melt(var_name="Sales Type", value_name="Sales Value")
-
-    # Rename for display only
-    sales_type_mapping = {
-        "TOTAL_INDUSTRY_SALES": "Total Industry Sales",
-        "GOODYEAR_SALES": "Goodyear Sales"
-    }
-    sales_data["Sales Type"] = sales_data["Sales Type"].map(sales_type_mapping)
-
-    fig_sales = px.bar(
-        sales_data,
-        x="Sales Type",
-        y="Sales Value",
-        title="Industry & Goodyear Sales",
-        text_auto=True,
-        color="Sales Type",
-        color_discrete_map={
-            "Total Industry Sales": "#1f77b4",  # Blue
-            "Goodyear Sales": "#ffcc00"  # Yellow
-        }
-    )
-
-    
-    fig_sales.update_layout(
-        xaxis_title="Sales Type",
-        yaxis_title="Sales Value"
-    )
-
+    sales_data = sections["sales"]
+    fig_sales = cached_figure(dataset_key, selection, "sales", lambda: charts.sales_figure(sales_data))
     st.plotly_chart(fig_sales, use_container_width=True)
 
     # ---- Market Share ----
     st.subheader("📊 Market Share of Goodyear")
-
-    # Drop duplicates to avoid miscalculations
-    market_share = df_filtered[["SOM_OF_BRAND"]].drop_duplicates()["SOM_OF_BRAND"].mean()
-
+    market_share = sections["market_share"]
     st.metric("Market Share (%)", f"{market_share * 100:.2f}%", help="Calculated based on SOM of the selected brand.")
 
     # ---- Competitor Sales ----
     st.subheader("🏆 Competitor Sales Comparison")
-
-    # Drop duplicates to prevent incorrect bar lengths
-    df_competitor_sales = (
-        df_filtered[["COMPETITOR_BRAND", "COMPETITOR_BRAND_SALES"]]
-        .drop_duplicates()
-        .groupby("COMPETITOR_BRAND", as_index=False)
-        .sum()
-        .sort_values(by="COMPETITOR_BRAND_SALES", ascending=False)
-        .head(10)  # Limit to top 35 competitors
-    )
-
-    fig_comp = px.bar(
-        df_competitor_sales, 
-        x="COMPETITOR_BRAND", 
-        y="COMPETITOR_BRAND_SALES", 
-        title="Top Competitor Sales", 
-        text_auto=True,
-        color_discrete_sequence=["#00CC96"]
-    )
-
-    fig_comp.update_layout(
-        xaxis_title="Competitor brand",
-        yaxis_title="Competitor brand sales",
-        xaxis={'categoryorder': 'total descending'}
-    )
-
+    df_competitor_sales = sections["competitor_sales"]
+    fig_comp = cached_figure(dataset_key, selection, "competitor_sales", lambda: charts.competitor_sales_figure(df_competitor_sales))
     st.plotly_chart(fig_comp, use_container_width=True)
 
     # ---- Market Share Distribution (Brand Name Only) ----
     st.subheader("📊 Market Share Distribution")
-
-    # Filter dataset to exclude missing brand names
-    df_valid_brands = df_filtered.dropna(subset=["BRAND_NAME"])
-
-    # Count occurrences of each brand
-    brand_counts = df_valid_brands["BRAND_NAME"].value_counts().reset_index()
-    brand_counts.columns = ["BRAND_NAME", "COUNT"]
-
-    # Calculate percentage share
-    total_brands = brand_counts["COUNT"].sum()
-    brand_counts["PERCENTAGE"] = (brand_counts["COUNT"] / total_brands) * 100
-
-    # Create pie chart with updated values
-    fig_pie = px.pie(
-        brand_counts, 
-        names="BRAND_NAME", 
-        values="PERCENTAGE", 
-        title="Market Share Distribution",
-        color_discrete_sequence=px.colors.qualitative.Pastel
-    )
-
-    # Show percentage on hover
-    fig_pie.update_traces(
-        textinfo="label",  # Show only brand names on chart
-        hovertemplate="<b>%{label}</b><br>Market Share: %{value:.2f}%"  # Show name & percentage on hover
-    )
-
+    brand_counts = sections["brand_share"]
+    fig_pie = cached_figure(dataset_key, selection, "brand_share", lambda: charts.brand_share_figure(brand_counts))
     st.plotly_chart(fig_pie, use_container_width=True)
 
     # ---- Top 10 Competitors Table ----
     st.subheader("🥇 Top 10 Competitors")
 
     # Rename columns
-    df_top_competitors = df_filtered.rename(columns={
+    df_top_competitors = sections["top_competitors"].rename(columns={
         "COMPETITOR_BRAND": "Competitor brand",
         "COMPETITOR_BRAND_SALES": "Competitor brand sales",
         "COMPETITOR_SOM_OF_BRAND": "Competitor market share"
     })
 
-    df_top_competitors = df_top_competitors[["Competitor brand", "Competitor brand sales", "Competitor market share"]].drop_duplicates()
-
-    # Aggregate values
-    df_top_competitors = df_top_competitors.groupby("Competitor brand", as_index=False).agg({
-        "Competitor brand sales": "max",
-        "Competitor market share": "mean"
-    })
-
-    # Sort and limit to top 10
-    df_top_competitors = df_top_competitors.sort_values(by="Competitor brand sales", ascending=False).head(10)
-
     # Format values
     df_top_competitors["Competitor market share"] = df_top_competitors["Competitor market share"] * 100
     df_top_competitors["Competitor market share"] = df_top_competitors["Competitor market share"].apply(lambda x: f"{x:.2f}%")
@@ -589,23 +359,7 @@ else:
     #     use_container_width=True
     # )
 
-    # Custom CSS for dynamic dark/light mode styling
-    st.markdown("""
-        <style>
-            /* Ensure visibility in dark mode */
-            div[data-testid="stDataFrame"] {
-                background-color: rgba(255, 255, 255, 0.1) !important; /* Transparent white for dark mode */
-                color: white !important; /* White text for dark mode */
-                border-radius: 10px;
-            }
-            div[data-testid="StyledDataFrame"] table {
-                background-color: transparent !important; /* Keep table transparent */
-                color: white !important; /* Keep text visible */
-            }
-        </style>
-    """, unsafe_allow_html=True)
-
-    df_top_competitors.reset_index(drop=True, inplace=True)
+
     df_top_competitors.index = range(1, len(df_top_competitors) + 1)
     # Display styled dataframe
     st.dataframe(df_top_competitors, use_container_width=True)
@@ -629,50 +383,20 @@ else:
     # Competitor selection filter from top 10 competitors
     selected_competitor = st.selectbox("Select Competitor", df_top_competitors["Competitor brand"].unique())
 
-    # Filter dataset for selected competitor
-    df_competitor_pattern = df_filtered[df_filtered["COMPETITOR_BRAND"] == selected_competitor]
-
-    # Drop duplicates to ensure correct values
-    df_pattern_sales = df_competitor_pattern[["COMPETITOR_PATTERN", "COMPETITOR_PATTERN_SALES"]].drop_duplicates()
-
     # Generate pie chart with correct values
-    fig_pattern_pie = px.pie(
-        df_pattern_sales, 
-        names="COMPETITOR_PATTERN", 
-        values="COMPETITOR_PATTERN_SALES", 
-        title=f"Sales Distribution by Pattern for {selected_competitor}",
-        color_discrete_sequence=px.colors.qualitative.Set3
+    df_pattern_sales = aggregates.pattern_sales(df_filtered, selected_competitor)
+    fig_pattern_pie = cached_figure(
+        dataset_key, selection, f"pattern_sales/{selected_competitor}",
+        lambda: charts.pattern_figure(df_pattern_sales, selected_competitor)
     )
-
     st.plotly_chart(fig_pattern_pie, use_container_width=True)
 
     # ---- Price Bar Chart ----
     st.subheader("💰 Price Comparison by Design")
-
-    # Drop rows where 'SALES_PRICE_IN_USD' or 'DESIGN_NAME' is missing
-    df_price_chart = df_filtered.dropna(subset=["SALES_PRICE_IN_USD", "DESIGN_NAME"])
+    df_price_chart = sections["price_by_design"]
 
     if not df_price_chart.empty:
-        fig_price = px.bar(
-            df_price_chart,
-            x="DESIGN_NAME",
-            y="SALES_PRICE_IN_USD",
-            title="Price Comparison by Design",
-            text=df_price_chart["SALES_PRICE_IN_USD"].apply(lambda x: f"${x:,.2f}"),  # Format text with dollar sign
-            hover_data={"SALES_PRICE_IN_USD": True, "DESIGN_NAME": True, "BRAND_NAME": True, "BRAND_TYPE": True},
-            color="BRAND_NAME",
-            color_discrete_sequence=px.colors.qualitative.Set1
-        )
-
-            # Adjust axis labels
-        fig_price.update_layout(
-            xaxis_title="Design Name",
-            yaxis_title="Sales Price in USD"
-        )
-
-        # Adjust text position so the longest bar has a visible label
-        fig_price.update_traces(textposition="outside", cliponaxis=False)
-
+        fig_price = cached_figure(dataset_key, selection, "price_by_design", lambda: charts.price_figure(df_price_chart))
         st.plotly_chart(fig_price, use_container_width=True)
     else:
         st.warning("No data available for the selected filters.")
@@ -680,61 +404,10 @@ else:
     
     # ---- Car Parc Data ----
     st.subheader("🚘 Carparc Data")
+    carparc_data = sections["carparc"]
 
-    if not df_filtered.empty:
-        carparc_data = df_filtered[["LUX_SUV_CARPARC", "TOTAL_CARPARC", "LUX_SUV_RATIO"]].drop_duplicates().iloc[0]
-
-        st.markdown("""
-            <style>
-                .card {
-                    background-color: #f8f8f8; /* Grey background */
-                    padding: 20px;
-                    border-radius: 10px;
-                    box-shadow: 2px 2px 5px rgba(0,0,0,0.2);
-                    width: 100%; /* Keep full width */
-                    margin-bottom: 10px;
-                }
-                .icon {
-                    font-size: 24px;
-                }
-                .title {
-                    font-size: 20px;
-                    font-weight: bold;
-                    margin-bottom: 10px;
-                    color: black; /* Ensure title is black */
-                }
-                .data-row {
-                    display: flex;
-                    justify-content: space-between;
-                    font-size: 18px; /* Keep original size */
-                    padding: 8px 0; /* Restore spacing */
-                    color: black; /* Ensure text is black */
-                }
-                .highlight {
-                    font-weight: bold;
-                    color: #a370f0; /* Purple for values */
-                }
-            </style>
-        """, unsafe_allow_html=True)
-
-        st.markdown(f"""
-            <div class="card">
-                <div class="icon">🔹</div>
-                <div class="title">Carparc Data</div>
-                <div class="data-row">
-                    <span>LUX SUV Carparc</span>
-                    <span class="highlight">{carparc_data['LUX_SUV_CARPARC']:,.2f}</span>
-                </div>
-                <div class="data-row">
-                    <span>Total Carparc</span>
-                    <span class="highlight">{carparc_data['TOTAL_CARPARC']:,.2f}</span>
-                </div>
-                <div class="data-row">
-                    <span>LUX SUV Ratio</span>
-                    <span class="highlight">{carparc_data['LUX_SUV_RATIO']*100:.2f}%</span>
-                </div>
-            </div>
-        """, unsafe_allow_html=True)
+    if carparc_data is not None:
+        st.markdown(charts.carparc_card_html(carparc_data), unsafe_allow_html=True)
 
     else:
         st.warning("No car parc data available for the selected filters.")
@@ -742,9 +415,16 @@ else:
 
     # ---- Top 5 Fitments ----
     st.subheader("🛞 Top 5 Fitments")
-    fitments = df_filtered["TOP_5_FITMENTS"].dropna().unique()
-    for fitment in fitments[:5]:
+    for fitment in sections["top_fitments"]:
         st.write(f"✅ {fitment}")
 
+# ---- Cache Metrics ----
+# Counters are per server process; the size is the shared cache directory
+with st.sidebar.expander("🗄️ Cache"):
+    cache_metrics = default_cache().metrics()
+    st.metric("Hit rate", f"{cache_metrics['hit_rate'] * 100:.1f}%")
+    st.write(f"{cache_metrics['hits']:,} hits / {cache_metrics['misses']:,} misses, {cache_metrics['evictions']:,} evictions")
+    st.write(f"{cache_metrics['size_bytes'] / 1e6:,.1f} MB of {cache_metrics['max_bytes'] / 1e6:,.0f} MB on disk")
+
 # ---- Footer ----
 st.markdown("***")
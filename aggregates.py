@@ -0,0 +1,116 @@
+"""Section aggregates computed from a filtered selection of the dataset.
+
+Every function takes the rows of one (year, country, tire size) selection and
+returns raw (unformatted) numbers, so the dashboard, exports and API agree.
+"""
+
+SALES_TYPE_MAPPING = {
+    "TOTAL_INDUSTRY_SALES": "Total Industry Sales",
+    "GOODYEAR_SALES": "Goodyear Sales"
+}
+
+
+# ---- Industry & Goodyear Sales ----
+def sales_data(df_filtered):
+    # Drop duplicates to ensure correct values
+    sales = df_filtered[["TOTAL_INDUSTRY_SALES", "GOODYEAR_SALES"]].drop_duplicates().melt(var_name="Sales Type", value_name="Sales Value")
+    sales["Sales Type"] = sales["Sales Type"].map(SALES_TYPE_MAPPING)
+    return sales
+
+
+# ---- Market Share ----
+def market_share(df_filtered):
+    # Drop duplicates to avoid miscalculations
+    return df_filtered[["SOM_OF_BRAND"]].drop_duplicates()["SOM_OF_BRAND"].mean()
+
+
+# ---- Competitor Sales ----
+def competitor_sales(df_filtered, limit=10):
+    # Drop duplicates to prevent incorrect bar lengths
+    return (
+        df_filtered[["COMPETITOR_BRAND", "COMPETITOR_BRAND_SALES"]]
+        .drop_duplicates()
+        .groupby("COMPETITOR_BRAND", as_index=False)
+        .sum()
+        .sort_values(by="COMPETITOR_BRAND_SALES", ascending=False)
+        .head(limit)
+    )
+
+
+# ---- Market Share Distribution (Brand Name Only) ----
+def brand_share(df_filtered):
+    # Count occurrences of each brand, excluding missing brand names
+    df_valid_brands = df_filtered.dropna(subset=["BRAND_NAME"])
+    brand_counts = df_valid_brands["BRAND_NAME"].value_counts().reset_index()
+    brand_counts.columns = ["BRAND_NAME", "COUNT"]
+
+    # Calculate percentage share
+    total_brands = brand_counts["COUNT"].sum()
+    brand_counts["PERCENTAGE"] = (brand_counts["COUNT"] / total_brands) * 100
+    return brand_counts
+
+
+# ---- Top 10 Competitors ----
+def top_competitors(df_filtered, limit=10):
+    columns = ["COMPETITOR_BRAND", "COMPETITOR_BRAND_SALES", "COMPETITOR_SOM_OF_BRAND"]
+    df_top = df_filtered[columns].drop_duplicates()
+
+    # Aggregate values
+    df_top = df_top.groupby("COMPETITOR_BRAND", as_index=False).agg({
+        "COMPETITOR_BRAND_SALES": "max",
+        "COMPETITOR_SOM_OF_BRAND": "mean"
+    })
+
+    # Sort and limit to top 10
+    df_top = df_top.sort_values(by="COMPETITOR_BRAND_SALES", ascending=False).head(limit)
+    return df_top.reset_index(drop=True)
+
+
+# ---- Competitor Pattern Analysis ----
+def pattern_sales(df_filtered, competitor):
+    df_competitor_pattern = df_filtered[df_filtered["COMPETITOR_BRAND"] == competitor]
+    return df_competitor_pattern[["COMPETITOR_PATTERN", "COMPETITOR_PATTERN_SALES"]].drop_duplicates()
+
+
+# ---- Price Comparison by Design ----
+def price_by_design(df_filtered):
+    # Drop rows where 'SALES_PRICE_IN_USD' or 'DESIGN_NAME' is missing
+    df_price = df_filtered.dropna(subset=["SALES_PRICE_IN_USD", "DESIGN_NAME"])
+    # Drop duplicates so each design's bar shows its price, not a stack of copies
+    return df_price[["DESIGN_NAME", "SALES_PRICE_IN_USD", "BRAND_NAME", "BRAND_TYPE"]].drop_duplicates()
+
+
+# ---- Car Parc Data ----
+def carparc(df_filtered):
+    if df_filtered.empty:
+        return None
+    return df_filtered[["LUX_SUV_CARPARC", "TOTAL_CARPARC", "LUX_SUV_RATIO"]].drop_duplicates().iloc[0]
+
+
+# ---- Top 5 Fitments ----
+def top_fitments(df_filtered, limit=5):
+    return list(df_filtered["TOP_5_FITMENTS"].dropna().unique()[:limit])
+
+
+def section_aggregates(df_filtered, competitor=None):
+    """Compute every section for one selection.
+
+    ``competitor`` picks the brand for the pattern breakdown; it defaults to the
+    top competitor, matching the dashboard's initial selectbox value.
+    """
+    df_top = top_competitors(df_filtered)
+    if competitor is None and not df_top.empty:
+        competitor = df_top["COMPETITOR_BRAND"].iloc[0]
+
+    return {
+        "sales": sales_data(df_filtered),
+        "market_share": market_share(df_filtered),
+        "competitor_sales": competitor_sales(df_filtered),
+        "brand_share": brand_share(df_filtered),
+        "top_competitors": df_top,
+        "competitor": competitor,
+        "pattern_sales": pattern_sales(df_filtered, competitor),
+        "price_by_design": price_by_design(df_filtered),
+        "carparc": carparc(df_filtered),
+        "top_fitments": top_fitments(df_filtered),
+    }
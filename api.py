@@ -0,0 +1,402 @@
+"""Standalone JSON API serving the dashboard aggregates.
+
+A small asyncio HTTP/1.1 server (keep-alive, no extra dependencies) that loads
+the dataset once and reuses the aggregate functions behind the dashboard:
+
+    GET /health
+    GET /selections
+    GET /metrics
+    GET /aggregates?year=1/1/2024&country=Malaysia&tire_size=205/55R16[&competitor=...]
+    GET /aggregates/<section>?year=...&country=...&tire_size=...
+
+competitor= picks the brand of the competitor/pattern_sales sections (default:
+the top competitor) and is ignored by every other section.
+
+ETags derive from the dataset content hash, the aggregate cache version and
+the request, so a matching If-None-Match is answered with 304 before any
+aggregate is computed. Computed sections and encoded bodies are kept in
+in-memory LRUs; only misses leave the event loop.
+
+    python api.py --host 0.0.0.0 --port 8502 --workers 4
+
+Load-test it with loadtest.py.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+import aggregates
+from data import DATA_PATH, dataset_hash, filter_selection, ingest
+from disk_cache import CACHE_VERSION, cached_sections, default_cache
+
+SECTIONS = (
+    "sales",
+    "market_share",
+    "competitor_sales",
+    "brand_share",
+    "top_competitors",
+    "competitor",
+    "pattern_sales",
+    "price_by_design",
+    "carparc",
+    "top_fitments",
+)
+# The only sections that depend on the competitor= parameter
+COMPETITOR_SECTIONS = ("competitor", "pattern_sales")
+SELECTION_PARAMS = ("year", "country", "tire_size")
+SELECTION_COLUMNS = ("SALES_YEAR", "COUNTRY_OR_TERRITORY", "TIRE_SIZE")
+
+MAX_HEADER_BYTES = 16 * 1024
+RESPONSE_CACHE_SIZE = 4096
+
+REASONS = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    501: "Not Implemented",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def to_jsonable(value):
+    if isinstance(value, pd.DataFrame):
+        return json.loads(value.to_json(orient="records"))
+    if isinstance(value, pd.Series):
+        return json.loads(value.to_json())
+    if pd.api.types.is_scalar(value) and pd.isna(value):
+        return None
+    if hasattr(value, "item"):
+        # numpy scalars
+        return value.item()
+    return value
+
+
+class LRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+
+    def get(self, key):
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+
+def encode_json(payload):
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+class AggregateService:
+    """Dataset, computed payloads, encoded responses and ETags for one API process.
+
+    Caches are only touched from the event loop; computations run in the
+    default thread pool, and concurrent misses on the same key share one run.
+    """
+
+    def __init__(self, path=DATA_PATH, cache_size=RESPONSE_CACHE_SIZE):
+        self.df, self.ingest_report = ingest(path)
+        self.dataset_hash = dataset_hash(path)
+        # Selections present in the data -> their competitor brands; anything
+        # else is answered 404 before it can reach the disk cache
+        keyed = self.df.dropna(subset=list(SELECTION_COLUMNS))
+        self._competitors = {
+            tuple(selection): frozenset(brands.dropna())
+            for selection, brands in keyed.groupby(list(SELECTION_COLUMNS))["COMPETITOR_BRAND"]
+        }
+        # selection -> every section, and (selection, competitor) -> its
+        # pattern sections; shared by all their URLs
+        self._payloads = LRUCache(cache_size)
+        # request key -> encoded JSON body
+        self._responses = LRUCache(cache_size)
+        self._pending = {}
+
+    def etag(self, key):
+        # CACHE_VERSION changes with the aggregate code, so clients revalidate
+        digest = hashlib.sha256(repr((self.dataset_hash, CACHE_VERSION, key)).encode("utf-8")).hexdigest()
+        return f'"{digest[:32]}"'
+
+    def selections(self):
+        return {
+            "years": self.df["SALES_YEAR"].dropna().unique().tolist(),
+            "countries": self.df["COUNTRY_OR_TERRITORY"].dropna().unique().tolist(),
+            "tire_sizes": self.df["TIRE_SIZE"].dropna().unique().tolist(),
+            # (year, country, tire_size) combinations present in the data
+            "selections": [list(selection) for selection in self._competitors],
+        }
+
+    def check(self, key):
+        """Raise 404 unless an aggregates key names a selection in the data."""
+        if key[0] != "aggregates":
+            return
+        _, selection, competitor, _ = key
+        competitors = self._competitors.get(selection)
+        if competitors is None:
+            raise HTTPError(404, f"No data for year={selection[0]}, country={selection[1]}, tire_size={selection[2]}")
+        if competitor is not None and competitor not in competitors:
+            raise HTTPError(404, f"Unknown competitor '{competitor}' for this selection")
+
+    def payload(self, selection):
+        sections = cached_sections(self.df, self.dataset_hash, selection)
+        return {name: to_jsonable(sections[name]) for name in SECTIONS}
+
+    def competitor_payload(self, selection, competitor):
+        # Like the dashboard's selectbox, only the pattern breakdown changes,
+        # so other competitors never add full section sets to the disk cache
+        df_filtered = filter_selection(self.df, *selection)
+        return {
+            "competitor": competitor,
+            "pattern_sales": to_jsonable(aggregates.pattern_sales(df_filtered, competitor)),
+        }
+
+    def warm(self):
+        # Precompute the default view of every selection before serving
+        for selection in self._competitors:
+            self._payloads.put(("payload", selection), self.payload(selection))
+
+    async def _once(self, key, cache, func, *args):
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.get_running_loop().run_in_executor(None, func, *args)
+            self._pending[key] = pending
+
+            def settle(future):
+                del self._pending[key]
+                if not future.cancelled() and future.exception() is None:
+                    cache.put(key, future.result())
+
+            pending.add_done_callback(settle)
+        # Shielded so one dropped connection does not cancel the shared run
+        return await asyncio.shield(pending)
+
+    async def response(self, key):
+        body = self._responses.get(key)
+        if body is not None:
+            return body
+
+        if key[0] == "health":
+            data = {
+                "status": "ok",
+                "dataset": self.dataset_hash,
+                "rows_loaded": self.ingest_report.rows_loaded,
+                "bad_rows": self.ingest_report.bad_rows,
+            }
+        elif key[0] == "selections":
+            data = self.selections()
+        else:
+            _, selection, competitor, section = key
+            payload = await self._once(("payload", selection), self._payloads, self.payload, selection)
+            if competitor is not None and competitor != payload["competitor"]:
+                payload = {**payload, **await self._once(
+                    ("competitor", selection, competitor), self._payloads,
+                    self.competitor_payload, selection, competitor,
+                )}
+            data = payload if section is None else payload[section]
+        return await self._once(key, self._responses, encode_json, data)
+
+
+def route(path, query):
+    """Map a request to a response cache key, validating its parameters."""
+    if path == "/health":
+        return ("health",)
+    if path == "/selections":
+        return ("selections",)
+    if path == "/metrics":
+        return ("metrics",)
+
+    if path == "/aggregates":
+        section = None
+    elif path.startswith("/aggregates/"):
+        section = path[len("/aggregates/"):]
+        if section not in SECTIONS:
+            raise HTTPError(404, f"Unknown section '{section}'")
+    else:
+        raise HTTPError(404, f"Unknown path '{path}'")
+
+    missing = [name for name in SELECTION_PARAMS if not query.get(name)]
+    if missing:
+        raise HTTPError(400, f"Missing query parameter(s): {', '.join(missing)}")
+    selection = tuple(query[name][0] for name in SELECTION_PARAMS)
+    competitor = query["competitor"][0] if query.get("competitor") else None
+    if section not in (None,) + COMPETITOR_SECTIONS:
+        # Ignored by this section: same key, cache entry and ETag as without it
+        competitor = None
+    return ("aggregates", selection, competitor, section)
+
+
+def encode_response(status, body=b"", etag=None, keep_alive=True, head=False):
+    headers = [
+        f"HTTP/1.1 {status} {REASONS[status]}",
+        f"Content-Length: {len(body)}",
+        "Cache-Control: no-cache",
+        "Connection: keep-alive" if keep_alive else "Connection: close",
+    ]
+    if body or status != 304:
+        headers.append("Content-Type: application/json")
+    if etag is not None:
+        headers.append(f"ETag: {etag}")
+    head_bytes = ("\r\n".join(headers) + "\r\n\r\n").encode("latin-1")
+    return head_bytes if head or status == 304 else head_bytes + body
+
+
+def error_body(message):
+    return json.dumps({"error": message}).encode("utf-8")
+
+
+async def handle_request(service, method, target, headers):
+    if method not in ("GET", "HEAD"):
+        raise HTTPError(405, f"Method {method} not allowed")
+
+    url = urlsplit(target)
+    key = route(url.path.rstrip("/") or "/", parse_qs(url.query))
+    if key == ("metrics",):
+        # Live counters: never cached or revalidated
+        return 200, encode_json({"disk_cache": default_cache().metrics()}), None
+
+    service.check(key)
+    etag = service.etag(key)
+    if_none_match = headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return 304, b"", etag
+
+    return 200, await service.response(key), etag
+
+
+async def serve_connection(service, reader, writer):
+    try:
+        while True:
+            try:
+                raw = await reader.readuntil(b"\r\n\r\n")
+            except asyncio.IncompleteReadError:
+                break
+            except asyncio.LimitOverrunError:
+                writer.write(encode_response(431, error_body("Headers too large"), keep_alive=False))
+                break
+
+            lines = raw.decode("latin-1").split("\r\n")
+            try:
+                method, target, version = lines[0].split(" ", 2)
+            except ValueError:
+                writer.write(encode_response(400, error_body("Malformed request line"), keep_alive=False))
+                break
+            headers = {}
+            for line in lines[1:]:
+                name, sep, value = line.partition(":")
+                if sep:
+                    headers[name.strip().lower()] = value.strip()
+
+            # Bodies are never used, but must be framed correctly to find the
+            # next pipelined request; anything we can't frame ends the connection
+            if "transfer-encoding" in headers:
+                writer.write(encode_response(501, error_body("Transfer-Encoding is not supported"), keep_alive=False))
+                break
+            try:
+                length = int(headers.get("content-length", "0") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                writer.write(encode_response(400, error_body("Invalid Content-Length"), keep_alive=False))
+                break
+            if length:
+                try:
+                    await reader.readexactly(length)
+                except asyncio.IncompleteReadError:
+                    break
+
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection != "close" and (version == "HTTP/1.1" or connection == "keep-alive")
+
+            try:
+                status, body, etag = await handle_request(service, method, target, headers)
+            except HTTPError as e:
+                status, body, etag = e.status, error_body(e.message), None
+            except Exception as e:
+                status, body, etag = 500, error_body(str(e)), None
+
+            writer.write(encode_response(status, body, etag, keep_alive, head=method == "HEAD"))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionResetError, BrokenPipeError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host, port, path=DATA_PATH, reuse_port=False):
+    service = AggregateService(path)
+    service.warm()
+    server = await asyncio.start_server(
+        lambda reader, writer: serve_connection(service, reader, writer),
+        host, port, limit=MAX_HEADER_BYTES, reuse_port=reuse_port,
+    )
+    print(f"[{os.getpid()}] Serving dashboard aggregates on http://{host}:{port} (dataset {service.dataset_hash[:12]})", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def run_worker(host, port, path, reuse_port):
+    try:
+        asyncio.run(serve(host, port, path, reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the dashboard aggregates as JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--data", default=DATA_PATH, help="Dataset CSV")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Server processes sharing the port via SO_REUSEPORT (Linux/BSD)")
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        run_worker(args.host, args.port, args.data, False)
+        return
+
+    # One event loop per core; the kernel balances connections between them
+    workers = [
+        multiprocessing.Process(target=run_worker, args=(args.host, args.port, args.data, True))
+        for _ in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.join()
+
+
+if __name__ == "__main__":
+    main()
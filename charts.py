@@ -0,0 +1,110 @@
+"""Plotly figures and HTML snippets for the dashboard sections."""
+
+import plotly.express as px
+
+
+def sales_figure(sales_data):
+    fig_sales = px.bar(
+        sales_data,
+        x="Sales Type",
+        y="Sales Value",
+        title="Industry & Goodyear Sales",
+        text_auto=True,
+        color="Sales Type",
+        color_discrete_map={
+            "Total Industry Sales": "#1f77b4",  # Blue
+            "Goodyear Sales": "#ffcc00"  # Yellow
+        }
+    )
+    fig_sales.update_layout(
+        xaxis_title="Sales Type",
+        yaxis_title="Sales Value"
+    )
+    return fig_sales
+
+
+def competitor_sales_figure(df_competitor_sales):
+    fig_comp = px.bar(
+        df_competitor_sales,
+        x="COMPETITOR_BRAND",
+        y="COMPETITOR_BRAND_SALES",
+        title="Top Competitor Sales",
+        text_auto=True,
+        color_discrete_sequence=["#00CC96"]
+    )
+    fig_comp.update_layout(
+        xaxis_title="Competitor brand",
+        yaxis_title="Competitor brand sales",
+        xaxis={'categoryorder': 'total descending'}
+    )
+    return fig_comp
+
+
+def brand_share_figure(brand_counts):
+    fig_pie = px.pie(
+        brand_counts,
+        names="BRAND_NAME",
+        values="PERCENTAGE",
+        title="Market Share Distribution",
+        color_discrete_sequence=px.colors.qualitative.Pastel
+    )
+    # Show only brand names on chart, name & percentage on hover
+    fig_pie.update_traces(
+        textinfo="label",
+        hovertemplate="<b>%{label}</b><br>Market Share: %{value:.2f}%"
+    )
+    return fig_pie
+
+
+def pattern_figure(df_pattern_sales, competitor):
+    return px.pie(
+        df_pattern_sales,
+        names="COMPETITOR_PATTERN",
+        values="COMPETITOR_PATTERN_SALES",
+        title=f"Sales Distribution by Pattern for {competitor}",
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
+
+
+def price_figure(df_price_chart):
+    fig_price = px.bar(
+        df_price_chart,
+        x="DESIGN_NAME",
+        y="SALES_PRICE_IN_USD",
+        title="Price Comparison by Design",
+        text=df_price_chart["SALES_PRICE_IN_USD"].apply(lambda x: f"${x:,.2f}"),  # Format text with dollar sign
+        hover_data={"SALES_PRICE_IN_USD": True, "DESIGN_NAME": True, "BRAND_NAME": True, "BRAND_TYPE": True},
+        color="BRAND_NAME",
+        color_discrete_sequence=px.colors.qualitative.Set1
+    )
+
+    # Adjust axis labels
+    fig_price.update_layout(
+        xaxis_title="Design Name",
+        yaxis_title="Sales Price in USD"
+    )
+
+    # Adjust text position so the longest bar has a visible label
+    fig_price.update_traces(textposition="outside", cliponaxis=False)
+    return fig_price
+
+
+def carparc_card_html(carparc_data):
+    return f"""
+        <div class="card">
+            <div class="icon">🔹</div>
+            <div class="title">Carparc Data</div>
+            <div class="data-row">
+                <span>LUX SUV Carparc</span>
+                <span class="highlight">{carparc_data['LUX_SUV_CARPARC']:,.2f}</span>
+            </div>
+            <div class="data-row">
+                <span>Total Carparc</span>
+                <span class="highlight">{carparc_data['TOTAL_CARPARC']:,.2f}</span>
+            </div>
+            <div class="data-row">
+                <span>LUX SUV Ratio</span>
+                <span class="highlight">{carparc_data['LUX_SUV_RATIO']*100:.2f}%</span>
+            </div>
+        </div>
+    """
@@ -0,0 +1,225 @@
+"""Dataset loading and selection filtering shared by the dashboard, exports and API.
+
+The CSV is ingested in chunks: the file is streamed as blocks of whole records,
+each block is parsed and validated in a worker process, and at most two blocks
+per worker are in flight, so the raw text held in memory is bounded regardless
+of file size. The parsed data itself is not: it is kept per column and joined
+one column at a time, so the peak is the loaded dataset plus one column rather
+than two full copies. Rows that fail numeric coercion or a range check are dropped and
+counted rather than reaching the charts as NaNs; rows missing a selection key
+are kept and flagged in MISSING_KEY.
+"""
+
+import hashlib
+import io
+import multiprocessing
+import os
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+DATA_PATH = "Data/202425_data_2countries_3tiresizes (1).csv"
+
+EXPECTED_COLUMNS = [
+    "SALES_YEAR", "COUNTRY_OR_TERRITORY", "TIRE_SIZE", "RIM_SIZE",
+    "TOTAL_INDUSTRY_SALES", "SOM_OF_SIZES", "GOODYEAR_SALES", "OTHERS_SALES",
+    "SOM_OF_BRAND", "BRAND_NAME", "DESIGN_NAME", "BRAND_TYPE",
+    "SALES_PRICE_IN_USD", "GOODYEAR_BRAND_SALES", "GOODYEAR_PATTERN_SALES",
+    "GOODYEAR_PATTERN_RANK_BY_SIZE_BRAND", "COMPETITOR_BRAND",
+    "COMPETITOR_BRAND_SALES", "COMPETITOR_SOM_OF_BRAND", "COMPETITOR_PATTERN",
+    "COMPETITOR_SALES_PRICE_IN_USD", "COMPETITOR_PATTERN_SALES",
+    "COMPETITOR_PATTERN_RANK_BY_SIZE_BRAND", "LUX_SUV_CARPARC", "TOTAL_CARPARC",
+    "LUX_SUV_RATIO", "TOP_5_FITMENTS",
+]
+TEXT_COLUMNS = [
+    "SALES_YEAR", "COUNTRY_OR_TERRITORY", "TIRE_SIZE", "BRAND_NAME",
+    "DESIGN_NAME", "BRAND_TYPE", "COMPETITOR_BRAND", "COMPETITOR_PATTERN",
+    "TOP_5_FITMENTS",
+]
+NUMERIC_COLUMNS = [column for column in EXPECTED_COLUMNS if column not in TEXT_COLUMNS]
+KEY_COLUMNS = ["SALES_YEAR", "COUNTRY_OR_TERRITORY", "TIRE_SIZE"]
+VALUE_RANGES = {
+    "SOM_OF_BRAND": (0, 1),
+    "LUX_SUV_RATIO": (0, 1),
+}
+
+CHUNK_BYTES = 1 << 20
+
+
+@dataclass
+class IngestReport:
+    rows_read: int = 0
+    rows_loaded: int = 0
+    # Records with more fields than the header
+    malformed: int = 0
+    # Loaded rows flagged in MISSING_KEY
+    missing_key: int = 0
+    # Per-column counts of values that failed coercion / range checks
+    invalid_numeric: Counter = field(default_factory=Counter)
+    out_of_range: Counter = field(default_factory=Counter)
+
+    @property
+    def bad_rows(self):
+        return self.rows_read - self.rows_loaded
+
+    def merge(self, other):
+        self.rows_read += other.rows_read
+        self.rows_loaded += other.rows_loaded
+        self.malformed += other.malformed
+        self.missing_key += other.missing_key
+        self.invalid_numeric.update(other.invalid_numeric)
+        self.out_of_range.update(other.out_of_range)
+
+    def summary(self):
+        parts = [f"{self.bad_rows:,} of {self.rows_read:,} rows dropped"]
+        if self.malformed:
+            parts.append(f"{self.malformed:,} malformed")
+        parts.extend(f"{column} not numeric: {count:,}" for column, count in self.invalid_numeric.items())
+        parts.extend(f"{column} out of range: {count:,}" for column, count in self.out_of_range.items())
+        if self.missing_key:
+            parts.append(f"{self.missing_key:,} rows missing a year/country/size")
+        return "; ".join(parts)
+
+
+def process_pool(max_workers=None, **kwargs):
+    # Streamlit installs the dashboard script as __main__, and spawned or
+    # forkserver workers re-import __main__, so fork wherever the platform
+    # supports it. Forking from a threaded server copies locks as they are,
+    # so modules with locks reset them in the child (see disk_cache)
+    start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(
+        max_workers=max_workers or os.cpu_count(),
+        mp_context=multiprocessing.get_context(start_method),
+        **kwargs,
+    )
+
+
+def _iter_blocks(f, chunk_bytes):
+    """Yield (text, record_count) blocks of whole CSV records from ``f``."""
+    lines = []
+    size = 0
+    records = 0
+    in_quotes = False
+    for line in f:
+        lines.append(line)
+        size += len(line)
+        # A quoted field may span lines; the record ends once quotes balance
+        if line.count('"') % 2:
+            in_quotes = not in_quotes
+        if not in_quotes and line.strip():
+            records += 1
+            if size >= chunk_bytes:
+                yield "".join(lines), records
+                lines, size, records = [], 0, 0
+    if lines:
+        yield "".join(lines), records + (1 if in_quotes else 0)
+
+
+def _parse_block(header, text, records):
+    """Parse and validate one block; return (frame, IngestReport)."""
+    report = IngestReport(rows_read=records)
+    df = pd.read_csv(
+        io.StringIO(header + text),
+        dtype={column: str for column in TEXT_COLUMNS},
+        on_bad_lines="skip",
+    )
+    report.malformed = records - len(df)
+
+    valid = pd.Series(True, index=df.index)
+    for column in NUMERIC_COLUMNS:
+        raw = df[column]
+        # The C parser already produced numbers unless a value didn't parse
+        if pd.api.types.is_numeric_dtype(raw):
+            continue
+        values = pd.to_numeric(raw, errors="coerce")
+        invalid = raw.notna() & values.isna()
+        if invalid.any():
+            report.invalid_numeric[column] += int(invalid.sum())
+        valid &= ~invalid
+        df[column] = values
+
+    for column, (low, high) in VALUE_RANGES.items():
+        out_of_range = df[column].notna() & ~df[column].between(low, high)
+        if out_of_range.any():
+            report.out_of_range[column] += int(out_of_range.sum())
+        valid &= ~out_of_range
+
+    df = df[valid]
+    df = df.assign(MISSING_KEY=df[KEY_COLUMNS].isna().any(axis=1))
+    report.rows_loaded = len(df)
+    report.missing_key = int(df["MISSING_KEY"].sum())
+    return df, report
+
+
+def ingest(path=DATA_PATH, max_workers=None, chunk_bytes=CHUNK_BYTES):
+    """Load and validate the dataset; return (DataFrame, IngestReport).
+
+    ``max_workers=1`` parses in-process, as do files of a single chunk.
+    """
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        header = f.readline()
+        columns = [column.strip().strip('"') for column in header.strip().split(",")]
+        missing = [column for column in EXPECTED_COLUMNS if column not in columns]
+        if missing:
+            raise ValueError(f"{path} is missing expected column(s): {', '.join(missing)}")
+
+        # Output column -> its values from each block, in file order
+        columns = {column: [] for column in EXPECTED_COLUMNS + ["MISSING_KEY"]}
+        report = IngestReport()
+
+        def collect(result):
+            frame, block_report = result
+            # Copied out of the block's 2-D arrays so each column's memory is
+            # released on its own below; unexpected extra columns are dropped
+            for column, parts in columns.items():
+                parts.append(frame[column].copy())
+            report.merge(block_report)
+
+        max_workers = max_workers or os.cpu_count()
+        blocks = _iter_blocks(f, chunk_bytes)
+        if max_workers == 1 or os.path.getsize(path) <= chunk_bytes:
+            for text, records in blocks:
+                collect(_parse_block(header, text, records))
+        else:
+            with process_pool(max_workers) as pool:
+                # Results are collected in file order; waiting on the oldest
+                # block before reading more bounds the raw text in flight
+                max_in_flight = 2 * max_workers
+                pending = deque()
+                for text, records in blocks:
+                    if len(pending) >= max_in_flight:
+                        collect(pending.popleft().result())
+                    pending.append(pool.submit(_parse_block, header, text, records))
+                while pending:
+                    collect(pending.popleft().result())
+
+    if not columns["MISSING_KEY"]:
+        return pd.DataFrame(columns=list(columns)), report
+    data = {}
+    for column in list(columns):
+        data[column] = pd.concat(columns.pop(column), ignore_index=True)
+    # copy=False keeps the joined columns as they are instead of consolidating
+    return pd.DataFrame(data, copy=False), report
+
+
+def load_data(path=DATA_PATH, max_workers=None):
+    return ingest(path, max_workers)[0]
+
+
+def dataset_hash(path=DATA_PATH):
+    # Content hash, so every process serving the same file agrees on it
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def filter_selection(df, year, country, tire_size):
+    return df[
+        (df["SALES_YEAR"] == year) &
+        (df["COUNTRY_OR_TERRITORY"] == country) &
+        (df["TIRE_SIZE"] == tire_size)
+    ]
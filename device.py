@@ -0,0 +1,26 @@
+"""Browser device detection, run once per session."""
+
+import os
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+_device_detect = components.declare_component(
+    "device_detect",
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "device_detect"),
+)
+
+
+def detect_mobile():
+    """Return whether the browser is mobile, or None until it has reported.
+
+    The component reports back on the rerun after it first renders; the answer
+    is kept in ``st.session_state.detected_mobile`` and the component is not
+    rendered again for the session.
+    """
+    if 'detected_mobile' not in st.session_state:
+        detected = _device_detect(key="device_detect", default=None)
+        if detected is None:
+            return None
+        st.session_state.detected_mobile = bool(detected)
+    return st.session_state.detected_mobile
@@ -0,0 +1,268 @@
+"""Content-addressed disk cache for section aggregates and figures.
+
+Entries are keyed on the dataset content hash plus the selection, so they stay
+valid across restarts and can be shared by every replica mounting the same
+volume. Values are stored as JSON in ``<root>/<aa>/<sha256>.json`` (frames and
+series with their dtypes), never pickled, so a shared volume cannot be used to
+run code and entries don't depend on the pandas version that wrote them. Any
+entry that fails to load is treated as a miss. Writes go through a temporary
+file and ``os.replace`` so concurrent readers never see a partial entry; ones
+left by a killed writer are removed on the next eviction. Hits refresh the
+file's mtime, and once the directory grows past ``max_bytes`` the least
+recently used entries are removed.
+
+    DASHBOARD_CACHE_DIR        cache directory (default .cache/dashboard)
+    DASHBOARD_CACHE_MAX_BYTES  size budget in bytes (default 512 MiB)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+
+import pandas as pd
+import plotly.io as pio
+
+import aggregates
+from data import filter_selection
+
+DEFAULT_DIR = os.path.join(".cache", "dashboard")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Bump when aggregate or figure code changes so old entries are not reused
+CACHE_VERSION = 4
+ENTRY_SUFFIX = ".json"
+# Version 1 pickles; still counted and evicted, never read
+LEGACY_SUFFIX = ".pkl"
+TMP_SUFFIX = ".tmp"
+# A writer killed between mkstemp and os.replace leaves its temporary file
+# behind; one older than this is abandoned, counted and removed on eviction
+TMP_GRACE_SECONDS = 60
+
+# Eviction trims to this fraction of max_bytes, so it doesn't run on every write
+EVICT_TO = 0.9
+
+_MISS = object()
+
+
+def _encode(value):
+    # json.dumps default= hook for the types section aggregates contain
+    if isinstance(value, pd.DataFrame):
+        return {
+            "__frame__": json.loads(value.to_json(orient="split", double_precision=15)),
+            "dtypes": {column: str(dtype) for column, dtype in value.dtypes.items()},
+        }
+    if isinstance(value, pd.Series):
+        return {
+            "__series__": json.loads(value.to_json(orient="split", double_precision=15)),
+            "dtype": str(value.dtype),
+        }
+    if hasattr(value, "item"):
+        # numpy scalars
+        return value.item()
+    raise TypeError(f"{type(value).__name__} cannot be stored in the disk cache")
+
+
+def _decode(obj):
+    if "__frame__" in obj:
+        return pd.DataFrame(**obj["__frame__"]).astype(obj["dtypes"])
+    if "__series__" in obj:
+        return pd.Series(**obj["__series__"]).astype(obj["dtype"])
+    return obj
+
+
+def dumps(value):
+    return json.dumps(value, default=_encode, separators=(",", ":")).encode("utf-8")
+
+
+def loads(blob):
+    return json.loads(blob, object_hook=_decode)
+
+
+class DiskCache:
+    def __init__(self, root=None, max_bytes=None):
+        self.root = root or os.environ.get("DASHBOARD_CACHE_DIR", DEFAULT_DIR)
+        self.max_bytes = int(max_bytes or os.environ.get("DASHBOARD_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+        self._lock = threading.Lock()
+        self._stats = Counter()
+        # Bytes on disk; rescanned on eviction since other replicas write too
+        self._size = None
+
+    def _path(self, parts):
+        key = hashlib.sha256(repr((CACHE_VERSION,) + tuple(parts)).encode("utf-8")).hexdigest()
+        return os.path.join(self.root, key[:2], key + ENTRY_SUFFIX)
+
+    def _record(self, **counts):
+        with self._lock:
+            self._stats.update(counts)
+
+    def get(self, parts, default=None):
+        path = self._path(parts)
+        try:
+            with open(path, "rb") as f:
+                blob = f.read()
+            value = loads(blob)
+        except FileNotFoundError:
+            self._record(misses=1)
+            return default
+        except Exception:
+            # Unreadable or stale entry (truncated, bad JSON, unknown dtype):
+            # drop it and recompute
+            self._record(misses=1, errors=1)
+            self._remove(path)
+            return default
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._record(hits=1, bytes_read=len(blob))
+        return value
+
+    def put(self, parts, value):
+        path = self._path(parts)
+        try:
+            blob = dumps(value)
+        except (TypeError, ValueError):
+            # Not representable as JSON: serve it uncached
+            self._record(errors=1)
+            return
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=TMP_SUFFIX)
+            with os.fdopen(fd, "wb") as f:
+                f.write(blob)
+            os.replace(tmp_path, path)
+        except OSError:
+            # A read-only or full volume degrades to computing every time
+            if tmp_path is not None:
+                self._remove(tmp_path)
+            self._record(errors=1)
+            return
+        self._record(writes=1, bytes_written=len(blob))
+
+        with self._lock:
+            if self._size is not None:
+                self._size += len(blob)
+            over_budget = self._size is None or self._size > self.max_bytes
+        if over_budget:
+            self.evict()
+
+    def get_or_compute(self, parts, compute):
+        value = self.get(parts, _MISS)
+        if value is _MISS:
+            value = compute()
+            self.put(parts, value)
+        return value
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _entries(self):
+        entries = []
+        tmp_cutoff = time.time() - TMP_GRACE_SECONDS
+        for dirpath, _, files in os.walk(self.root):
+            for name in files:
+                if not name.endswith((ENTRY_SUFFIX, LEGACY_SUFFIX, TMP_SUFFIX)):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    # Evicted by another replica meanwhile
+                    continue
+                if name.endswith(TMP_SUFFIX) and stat.st_mtime >= tmp_cutoff:
+                    # Probably still being written
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """Remove least recently used entries until under budget; return bytes on disk."""
+        entries = []
+        evicted = 0
+        for entry in self._entries():
+            # Abandoned temporary files go whatever the budget
+            if entry[2].endswith(TMP_SUFFIX):
+                self._remove(entry[2])
+                evicted += 1
+            else:
+                entries.append(entry)
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            target = self.max_bytes * EVICT_TO
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                self._remove(path)
+                total -= size
+                evicted += 1
+        with self._lock:
+            self._size = total
+            self._stats["evictions"] += evicted
+        return total
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+            size = self._size
+        if size is None:
+            size = self.evict()
+        hits = stats.get("hits", 0)
+        lookups = hits + stats.get("misses", 0)
+        return {
+            "hits": hits,
+            "misses": stats.get("misses", 0),
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "writes": stats.get("writes", 0),
+            "evictions": stats.get("evictions", 0),
+            "errors": stats.get("errors", 0),
+            "bytes_read": stats.get("bytes_read", 0),
+            "bytes_written": stats.get("bytes_written", 0),
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+
+@lru_cache(maxsize=None)
+def default_cache():
+    return DiskCache()
+
+
+# Pool workers are forked while other server threads may hold the cache's
+# lock, which would then stay locked forever in the child; children start
+# with a fresh cache instead
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=default_cache.cache_clear)
+
+
+def _selection_key(selection):
+    # numpy and Python strings repr differently; keys must match across callers
+    return tuple(str(part) for part in selection)
+
+
+def cached_sections(df, dataset_key, selection, competitor=None, cache=None):
+    """Every section aggregate for ``selection``, from disk when available."""
+    cache = cache or default_cache()
+    return cache.get_or_compute(
+        ("sections", dataset_key, _selection_key(selection), competitor),
+        lambda: aggregates.section_aggregates(filter_selection(df, *selection), competitor),
+    )
+
+
+def cached_figure(dataset_key, selection, name, build, cache=None):
+    """A figure built by ``build()``, stored as plotly JSON."""
+    cache = cache or default_cache()
+    fig_json = cache.get_or_compute(
+        ("figure", dataset_key, _selection_key(selection), name),
+        lambda: build().to_json(),
+    )
+    return pio.from_json(fig_json)
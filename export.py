@@ -0,0 +1,280 @@
+"""Static exports of dashboard selections, rendered in a process pool.
+
+Each selection (year, country, tire size) is written to its own folder with a
+CSV extract per section and the charts as HTML, PNG and/or PDF. Rendering runs
+in worker processes so the Streamlit script never blocks on it; every worker
+loads the dataset once in its initializer instead of receiving it per task.
+
+Batch export from the command line:
+
+    python export.py --year 1/1/2024 --formats html png
+
+PNG/PDF need kaleido 1.x, which drives a local Chrome/Chromium. If none is
+installed, run ``plotly_get_chrome`` once to download one.
+"""
+
+import argparse
+import html
+import importlib.util
+import io
+import os
+import re
+import shutil
+import time
+import zipfile
+from concurrent.futures import as_completed
+from datetime import datetime
+
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+import charts
+from data import DATA_PATH, dataset_hash, load_data, process_pool
+from disk_cache import cached_figure, cached_sections
+
+EXPORT_FORMATS = ("html", "png", "pdf")
+EXPORT_DIR = "exports"
+# Dashboard export folders older than this are removed on the next export
+EXPORT_MAX_AGE_SECONDS = 24 * 60 * 60
+IMAGE_PROBE_RETRY_SECONDS = 60
+
+THEME_CSS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "theme.css")
+PAGE_STYLE = "body { font-family: sans-serif; margin: 2rem; }"
+
+# Dataset and its content hash, loaded once per worker process by _init_worker
+_worker_df = None
+_worker_dataset_key = None
+
+
+def _init_worker(path):
+    global _worker_df, _worker_dataset_key
+    # Pool workers are daemonic and cannot start an ingest pool of their own
+    _worker_df = load_data(path, max_workers=1)
+    _worker_dataset_key = dataset_hash(path)
+
+
+def _theme_css():
+    # Same stylesheet the dashboard links, inlined so the page stands alone
+    with open(THEME_CSS, encoding="utf-8") as f:
+        return f.read()
+
+
+def check_formats(formats):
+    unknown = set(formats) - set(EXPORT_FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown export format(s): {', '.join(sorted(unknown))}")
+    # Static images go through plotly's kaleido engine, which is optional
+    if {"png", "pdf"} & set(formats) and importlib.util.find_spec("kaleido") is None:
+        raise RuntimeError("PNG/PDF export requires the 'kaleido' package")
+
+
+# (error or None, time.monotonic()) of this process's last image probe
+_image_probe = None
+
+
+def check_image_export():
+    """Raise unless this process can render images; probes at most once a minute.
+
+    kaleido 1.x imports fine without Chrome and only fails at render time, so
+    one empty figure is rendered first. It launches Chrome, so this runs in the
+    pool workers and the CLI, never on the dashboard's script thread. A
+    success is kept; a failure is retried after IMAGE_PROBE_RETRY_SECONDS so
+    installing Chrome takes effect without a restart.
+    """
+    global _image_probe
+    if _image_probe is None or (
+        _image_probe[0] is not None and time.monotonic() - _image_probe[1] >= IMAGE_PROBE_RETRY_SECONDS
+    ):
+        error = None
+        try:
+            pio.to_image(go.Figure(), format="png", width=10, height=10)
+        except Exception as e:
+            lines = [line.strip() for line in str(e).splitlines() if line.strip()]
+            error = lines[0] if lines else type(e).__name__
+        _image_probe = (error, time.monotonic())
+    if _image_probe[0] is not None:
+        raise RuntimeError(
+            f"PNG/PDF export is unavailable ({_image_probe[0]}); run 'plotly_get_chrome' to install Chrome"
+        )
+
+
+def selection_slug(selection):
+    return "_".join(re.sub(r"[^A-Za-z0-9]+", "-", str(part)).strip("-") for part in selection)
+
+
+def all_selections(df, year):
+    pairs = df.loc[df["SALES_YEAR"] == year, ["COUNTRY_OR_TERRITORY", "TIRE_SIZE"]].drop_duplicates()
+    return [(year, country, size) for country, size in pairs.itertuples(index=False)]
+
+
+def _section_frames(sections):
+    carparc = sections["carparc"]
+    return {
+        "sales": sections["sales"],
+        "market_share": pd.DataFrame({"SOM_OF_BRAND": [sections["market_share"]]}),
+        "competitor_sales": sections["competitor_sales"],
+        "brand_share": sections["brand_share"],
+        "top_competitors": sections["top_competitors"],
+        "pattern_sales": sections["pattern_sales"],
+        "price_by_design": sections["price_by_design"],
+        "carparc": carparc.to_frame().T if carparc is not None else pd.DataFrame(),
+        "top_fitments": pd.DataFrame({"TOP_5_FITMENTS": sections["top_fitments"]}),
+    }
+
+
+def _section_figures(dataset_key, selection, sections):
+    # Same cache entries as the dashboard's figures
+    builders = {
+        "sales": lambda: charts.sales_figure(sections["sales"]),
+        "competitor_sales": lambda: charts.competitor_sales_figure(sections["competitor_sales"]),
+        "brand_share": lambda: charts.brand_share_figure(sections["brand_share"]),
+    }
+    if not sections["pattern_sales"].empty:
+        builders[f"pattern_sales/{sections['competitor']}"] = (
+            lambda: charts.pattern_figure(sections["pattern_sales"], sections["competitor"])
+        )
+    if not sections["price_by_design"].empty:
+        builders["price_by_design"] = lambda: charts.price_figure(sections["price_by_design"])
+    return {
+        name.split("/")[0]: cached_figure(dataset_key, selection, name, build)
+        for name, build in builders.items()
+    }
+
+
+def _page_html(selection, sections, figures):
+    year, country, tire_size = selection
+    parts = [
+        "<h1>🚗 Tire Market Dashboard</h1>",
+        f"<h4>{html.escape(f'{country} · {tire_size} · {year}')}</h4>",
+        f"<h2>📊 Market Share of Goodyear</h2><h3>{sections['market_share'] * 100:.2f}%</h3>",
+    ]
+    # Only the first chart embeds plotly.js (inline, so the page works
+    # offline); the rest reuse it
+    include_plotlyjs = True
+    for fig in figures.values():
+        parts.append(fig.to_html(full_html=False, include_plotlyjs=include_plotlyjs))
+        include_plotlyjs = False
+
+    parts.append("<h2>🥇 Top 10 Competitors</h2>")
+    parts.append(sections["top_competitors"].to_html(index=False))
+    if sections["carparc"] is not None:
+        parts.append(charts.carparc_card_html(sections["carparc"]))
+    parts.append("<h2>🛞 Top 5 Fitments</h2><ul>")
+    parts.extend(f"<li>{html.escape(fitment)}</li>" for fitment in sections["top_fitments"])
+    parts.append("</ul>")
+
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+        f"<title>Tire Market Dashboard - {html.escape(selection_slug(selection))}</title>"
+        f"<style>{PAGE_STYLE}\n{_theme_css()}</style></head><body>"
+        + "\n".join(parts)
+        + "</body></html>"
+    )
+
+
+def render_selection(selection, out_dir, formats=("html",), df=None, dataset_key=None):
+    """Write the CSV extracts and charts of one selection; return its folder."""
+    if df is None:
+        df = _worker_df if _worker_df is not None else load_data()
+    if dataset_key is None:
+        dataset_key = _worker_dataset_key if _worker_dataset_key is not None else dataset_hash()
+
+    # Fail before writing anything rather than leave a partial folder
+    if {"png", "pdf"} & set(formats):
+        check_image_export()
+
+    sections = cached_sections(df, dataset_key, selection)
+
+    target = os.path.join(out_dir, selection_slug(selection))
+    os.makedirs(target, exist_ok=True)
+
+    for name, frame in _section_frames(sections).items():
+        frame.to_csv(os.path.join(target, f"{name}.csv"), index=False)
+
+    figures = _section_figures(dataset_key, selection, sections)
+    if "html" in formats:
+        with open(os.path.join(target, "dashboard.html"), "w", encoding="utf-8") as f:
+            f.write(_page_html(selection, sections, figures))
+    for fmt in ("png", "pdf"):
+        if fmt in formats:
+            for name, fig in figures.items():
+                fig.write_image(os.path.join(target, f"{name}.{fmt}"))
+
+    return target
+
+
+def make_pool(max_workers=None, path=DATA_PATH):
+    return process_pool(max_workers, initializer=_init_worker, initargs=(path,))
+
+
+def new_export_dir(root=EXPORT_DIR):
+    return os.path.join(root, datetime.now().strftime("%Y%m%d-%H%M%S-%f"))
+
+
+def submit_batch(pool, selections, out_dir, formats=("html",)):
+    check_formats(formats)
+    return [pool.submit(render_selection, selection, out_dir, tuple(formats)) for selection in selections]
+
+
+def export_batch(selections, out_dir, formats=("html",), max_workers=None, progress=None):
+    """Export ``selections`` across all cores, calling ``progress(done, total)``."""
+    with make_pool(max_workers) as pool:
+        futures = submit_batch(pool, selections, out_dir, formats)
+        targets = []
+        for done, future in enumerate(as_completed(futures), start=1):
+            targets.append(future.result())
+            if progress is not None:
+                progress(done, len(futures))
+    return targets
+
+
+def zip_exports(out_dir, remove=False):
+    """Zip ``out_dir`` into bytes, deleting the folder afterwards if ``remove``."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for root, _, files in os.walk(out_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                archive.write(path, os.path.relpath(path, out_dir))
+    if remove:
+        shutil.rmtree(out_dir, ignore_errors=True)
+    return buffer.getvalue()
+
+
+def cleanup_exports(root=EXPORT_DIR, max_age=EXPORT_MAX_AGE_SECONDS):
+    # Folders left behind by sessions that never collected their zip
+    if not os.path.isdir(root):
+        return
+    cutoff = time.time() - max_age
+    for entry in os.scandir(root):
+        if entry.is_dir() and entry.stat().st_mtime < cutoff:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch export every (country, tire size) pair of a year.")
+    parser.add_argument("--year", help="SALES_YEAR to export (default: every year)")
+    parser.add_argument("--formats", nargs="+", default=["html"], choices=EXPORT_FORMATS)
+    parser.add_argument("--out", default=None, help="Output folder (default: a new folder under exports/)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    check_formats(args.formats)
+    if {"png", "pdf"} & set(args.formats):
+        # Probed here once so forked workers inherit the result
+        check_image_export()
+    df = load_data()
+    years = [args.year] if args.year else list(df["SALES_YEAR"].unique())
+    selections = [selection for year in years for selection in all_selections(df, year)]
+    out_dir = args.out or new_export_dir()
+
+    export_batch(
+        selections, out_dir, args.formats, args.workers,
+        progress=lambda done, total: print(f"[{done}/{total}] exported", flush=True),
+    )
+    print(f"Exports written to {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Local load test for the aggregates API (api.py).
+
+Opens ``--concurrency`` keep-alive connections and cycles through every
+selection and section for ``--duration`` seconds, then prints throughput,
+status counts and latency percentiles. With ``--conditional`` each request
+revalidates with the ETag from the previous response, exercising the 304 path.
+Only selections present in the data are requested; responses other than
+200/304 are counted separately and left out of throughput and latency.
+
+    python api.py --port 8502 &
+    python loadtest.py --port 8502 --concurrency 64 --duration 10
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter
+from urllib.parse import urlencode
+
+from api import SECTIONS
+
+
+async def send(reader, writer, host, path, etag=None):
+    request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\n"
+    if etag:
+        request += f"If-None-Match: {etag}\r\n"
+    writer.write((request + "\r\n").encode("latin-1"))
+    await writer.drain()
+
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    status = int(head[0].split(" ", 2)[1])
+    headers = {}
+    for line in head[1:]:
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", "0")))
+    return status, headers.get("etag"), body
+
+
+async def fetch_paths(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    _, _, body = await send(reader, writer, host, "/selections")
+    writer.close()
+
+    selections = json.loads(body)
+    paths = []
+    # Only combinations present in the data; any other one is a cheap 404
+    for year, country, tire_size in selections["selections"]:
+        query = urlencode({"year": year, "country": country, "tire_size": tire_size})
+        paths.append(f"/aggregates?{query}")
+        paths.extend(f"/aggregates/{section}?{query}" for section in SECTIONS)
+    return paths
+
+
+async def client(host, port, paths, deadline, conditional, etags, latencies, statuses, offset):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for i in itertools.count(offset):
+            if time.perf_counter() >= deadline:
+                break
+            path = paths[i % len(paths)]
+            start = time.perf_counter()
+            status, etag, _ = await send(reader, writer, host, path, etags.get(path) if conditional else None)
+            statuses[status] += 1
+            if status in (200, 304):
+                latencies.append(time.perf_counter() - start)
+            if etag:
+                etags[path] = etag
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run(host, port, concurrency, duration, conditional):
+    paths = await fetch_paths(host, port)
+    # ETags are shared between connections, like a client-side cache
+    etags = {}
+    latencies = []
+    statuses = Counter()
+
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(
+        client(host, port, paths, deadline, conditional, etags, latencies, statuses, offset)
+        for offset in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    failed = sum(statuses.values()) - len(latencies)
+    print(f"{sum(statuses.values())} requests in {elapsed:.2f}s over {concurrency} connections "
+          f"({len(paths)} distinct URLs)")
+    print(f"Throughput: {len(latencies) / elapsed:,.0f} req/s (200/304 only)")
+    print("Statuses: " + ", ".join(f"{status}={count}" for status, count in sorted(statuses.items())))
+    if failed:
+        print(f"Failed: {failed} responses other than 200/304, excluded from throughput and latency")
+    print("Latency ms: " + ", ".join(
+        f"p{pct}={percentile(latencies, pct) * 1000:.2f}" for pct in (50, 90, 99)
+    ) + f", max={latencies[-1] * 1000 if latencies else 0:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the dashboard aggregates API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--concurrency", type=int, default=32, help="Keep-alive connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--conditional", action="store_true", help="Revalidate with If-None-Match")
+    args = parser.parse_args()
+    asyncio.run(run(args.host, args.port, args.concurrency, args.duration, args.conditional))
+
+
+if __name__ == "__main__":
+    main()